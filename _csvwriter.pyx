@@ -0,0 +1,97 @@
+# cython: language_level=3
+"""
+Optional C encoder for large annotation CSV rewrites.
+Build in place with `cythonize -i _csvwriter.pyx`; main.py falls back to
+csv.writer when the compiled module is missing.
+"""
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from libc.stdlib cimport free, realloc
+from libc.string cimport memcpy
+
+
+cdef extern from "Python.h":
+    const char* PyUnicode_AsUTF8AndSize(object unicode, Py_ssize_t* size) except NULL
+
+
+cdef struct Buffer:
+    char* data
+    Py_ssize_t length
+    Py_ssize_t capacity
+
+
+cdef int _reserve(Buffer* buf, Py_ssize_t extra) except -1:
+    cdef Py_ssize_t capacity = buf.capacity
+    cdef char* data
+    if buf.length + extra <= capacity:
+        return 0
+    if capacity == 0:
+        capacity = 1 << 16
+    while capacity < buf.length + extra:
+        capacity *= 2
+    data = <char*>realloc(buf.data, capacity)
+    if data == NULL:
+        raise MemoryError()
+    buf.data = data
+    buf.capacity = capacity
+    return 0
+
+
+cdef int _write_field(Buffer* buf, str field) except -1:
+    # Same rules as csv.writer's default QUOTE_MINIMAL dialect.
+    cdef Py_ssize_t size, i
+    cdef const char* text = PyUnicode_AsUTF8AndSize(field, &size)
+    cdef bint quote = False
+    cdef char c
+    for i in range(size):
+        c = text[i]
+        if c == c',' or c == c'"' or c == c'\r' or c == c'\n':
+            quote = True
+            break
+
+    if not quote:
+        _reserve(buf, size)
+        memcpy(buf.data + buf.length, text, size)
+        buf.length += size
+        return 0
+
+    _reserve(buf, 2 * size + 2)
+    buf.data[buf.length] = c'"'
+    buf.length += 1
+    for i in range(size):
+        if text[i] == c'"':
+            buf.data[buf.length] = c'"'
+            buf.length += 1
+        buf.data[buf.length] = text[i]
+        buf.length += 1
+    buf.data[buf.length] = c'"'
+    buf.length += 1
+    return 0
+
+
+def encode_rows(list rows):
+    """
+    Encodes (filename, labels) string pairs to UTF-8 CSV with CRLF line
+    endings. Returns the bytes and one (offset, length) span per row.
+    """
+    cdef Buffer buf
+    cdef Py_ssize_t start
+    buf.data = NULL
+    buf.length = 0
+    buf.capacity = 0
+    spans = []
+    try:
+        for filename, labels in rows:
+            start = buf.length
+            _write_field(&buf, filename)
+            _reserve(&buf, 1)
+            buf.data[buf.length] = c','
+            buf.length += 1
+            _write_field(&buf, labels)
+            _reserve(&buf, 2)
+            buf.data[buf.length] = c'\r'
+            buf.data[buf.length + 1] = c'\n'
+            buf.length += 2
+            spans.append((start, buf.length - start))
+        return PyBytes_FromStringAndSize(buf.data, buf.length), spans
+    finally:
+        free(buf.data)
@@ -1,23 +1,64 @@
-import gradio as gr
+import atexit
+import importlib.util
 import os
 import csv
-import zipfile
-import shutil
-import tempfile
+import io
+import threading
+from itertools import islice
+from operator import itemgetter
+
+# Optional Parquet/Feather export; pyarrow itself is imported on first use.
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    from _csvwriter import encode_rows as encode_csv_rows_c
+except ImportError:  # optional: build with `cythonize -i _csvwriter.pyx`
+    encode_csv_rows_c = None
 
 # --- Constants ---
 OUTPUT_CSV = "annotations.csv"
+OUTPUT_PARQUET = "annotations.parquet"
+OUTPUT_FEATHER = "annotations.feather"
 DEFAULT_LABELS = []
 TEMP_AUDIO_DIR = "temp_audio"
+AUDIO_EXTS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a')
+CSV_FIELDS = ["filename", "labels"]
+TABLE_MAX_ROWS = 200
+# Full rewrites above this many rows go through the compiled encoder.
+C_ENCODER_MIN_ROWS = 1000
+
+# (byte offset, byte length) of every row currently in OUTPUT_CSV, keyed by
+# filename. Empty until the file has been fully written once this session.
+row_offsets = {}
+
+# Absolute source path -> temp path handed to Gradio, so each file outside
+# cwd/tmp is copied at most once per session.
+_audio_path_cache = {}
+
+# Last parsed annotation file, keyed by (path, mtime, size), so reloading a
+# directory only re-parses when the file on disk actually changed.
+_csv_cache = {"key": None, "data": {}}
+
+# OUTPUT_CSV stays open for the whole session instead of open/close per save.
+_csv_fp = None
+# Handlers run concurrently once the queue is enabled; this guards the handle,
+# row_offsets, the shared row encoder, _csv_cache and in-place changes to the
+# annotations dict. Re-entrant because a save can fall back to a full rewrite.
+_csv_lock = threading.RLock()
 
 def load_directory(path):
+    """
+    Returns (path, basename) pairs for the audio files in `path`, sorted by
+    name. The basename is kept so later clicks never re-split the path.
+    """
     if not path or not os.path.exists(path):
         return []
-    return sorted([
-        os.path.join(path, f)
-        for f in os.listdir(path)
-        if f.lower().endswith(('.wav', '.mp3', '.flac', '.ogg', '.m4a'))
-    ])
+    # Sort on the bare name: every entry shares the directory prefix, so
+    # comparing full paths only repeats work.
+    with os.scandir(path) as it:
+        entries = [(e.path, e.name) for e in it if e.is_file() and e.name.lower().endswith(AUDIO_EXTS)]
+    entries.sort(key=lambda x: x[1])
+    return entries
 
 
 def load_labels_from_fileobj(fileobj):
@@ -29,15 +70,29 @@ def load_labels_from_fileobj(fileobj):
     except Exception:
         return DEFAULT_LABELS
         
+def _cleanup_audio_path_cache():
+    for tmp_path in _audio_path_cache.values():
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+    _audio_path_cache.clear()
+
+atexit.register(_cleanup_audio_path_cache)
+
 def ensure_readable_audio_path(path):
     """
     Copies the given audio file into a temporary directory managed by tempfile,
     ensuring the file is accessible to Gradio without path issues.
+    Results are cached, so each file is copied at most once per session.
     Returns the new temp file path.
     """
     if not path:
         return None
 
+    import shutil
+    import tempfile
+
     path = os.path.abspath(path)
     cwd = os.path.abspath(os.getcwd())
 
@@ -45,73 +100,223 @@ def ensure_readable_audio_path(path):
     if path.startswith(cwd) or path.startswith(tempfile.gettempdir()):
         return path
 
-    # Copy to a new temp file preserving the extension
+    cached = _audio_path_cache.get(path)
+    if cached is not None:
+        return cached
+
+    # Copy to a new temp file preserving the extension. A symlink would be
+    # cheaper, but Gradio resolves it back outside its allowed paths.
     suffix = os.path.splitext(path)[1]
     try:
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            shutil.copyfile(path, tmp_file.name)
-            return tmp_file.name
+            tmp_path = tmp_file.name
+        shutil.copyfile(path, tmp_path)
     except Exception as e:
         raise RuntimeError(f"Failed to copy audio file to temp directory: {e}")
+    _audio_path_cache[path] = tmp_path
+    return tmp_path
 
         
 def navigate_files(direction, current_index, file_list):
     if not file_list:
         return 0, None, "No files loaded", ""
     new_index = max(0, min(current_index + direction, len(file_list) - 1))
-    original_path=file_list[new_index]
-    current_file = file_list[new_index]
-    current_file=ensure_readable_audio_path(original_path)
-    filename = os.path.basename(original_path)
+    original_path, filename = file_list[new_index]
+    current_file = ensure_readable_audio_path(original_path)
     status = f"File {new_index+1} / {len(file_list)}"
     return new_index, current_file, status, filename
 
+# One writer reused for every row; a tuple writerow skips DictWriter's
+# per-call dict-to-row mapping.
+_row_buf = io.StringIO()
+_row_writer = csv.writer(_row_buf)
+
+def encode_csv_row(row):
+    _row_buf.seek(0)
+    _row_buf.truncate()
+    _row_writer.writerow(row)
+    return _row_buf.getvalue().encode('utf-8')
+
+def get_csv_handle():
+    global _csv_fp
+    if _csv_fp is None or _csv_fp.closed:
+        mode = 'r+b' if os.path.exists(OUTPUT_CSV) else 'w+b'
+        _csv_fp = open(OUTPUT_CSV, mode, buffering=1 << 16)
+    return _csv_fp
+
+def close_csv_handle():
+    if _csv_fp is not None:
+        _csv_fp.close()
+
+atexit.register(close_csv_handle)
+
+def write_annotations_csv(annotations):
+    """
+    Rewrites OUTPUT_CSV from scratch and records where each row landed,
+    so later single-file saves can append or patch in place.
+    """
+    with _csv_lock:
+        _csv_cache["key"] = None
+        # One snapshot feeds both the encoding and the offsets, so they can't
+        # disagree even if a caller changes the dict outside the lock.
+        items = list(annotations.items())
+        # Offsets are only published once the bytes are on disk; after any
+        # failure the index is dropped so the next save rewrites in full.
+        offsets = {}
+        try:
+            chunks = [encode_csv_row(CSV_FIELDS)]
+            offset = len(chunks[0])
+            if encode_csv_rows_c is not None and len(items) > C_ENCODER_MIN_ROWS:
+                data, spans = encode_csv_rows_c(
+                    [(filename, ", ".join(entry["labels"])) for filename, entry in items])
+                for (filename, _), (start, length) in zip(items, spans):
+                    offsets[filename] = (offset + start, length)
+                chunks.append(data)
+            else:
+                for filename, entry in items:
+                    data = encode_csv_row((filename, ", ".join(entry["labels"])))
+                    offsets[filename] = (offset, len(data))
+                    offset += len(data)
+                    chunks.append(data)
+            f = get_csv_handle()
+            f.seek(0)
+            f.write(b"".join(chunks))
+            f.truncate()
+            f.flush()
+        except Exception:
+            row_offsets.clear()
+            raise
+        row_offsets.clear()
+        row_offsets.update(offsets)
+
+def persist_annotation(entry, annotations):
+    """
+    Writes a single annotation to OUTPUT_CSV. New rows are appended and
+    edits of the same encoded length are overwritten in place; anything
+    else falls back to a full rewrite.
+    """
+    with _csv_lock:
+        if not os.path.exists(OUTPUT_CSV):
+            # Removed behind our back: drop the handle to the unlinked file.
+            close_csv_handle()
+            row_offsets.clear()
+        if not row_offsets:
+            write_annotations_csv(annotations)
+            return
+
+        data = encode_csv_row((entry["filename"], ", ".join(entry["labels"])))
+        known = row_offsets.get(entry["filename"])
+        if known is not None and known[1] != len(data):
+            write_annotations_csv(annotations)
+            return
+
+        # Same-length patches can land within one mtime tick; don't trust the key.
+        _csv_cache["key"] = None
+        try:
+            f = get_csv_handle()
+            if known is None:
+                f.seek(0, os.SEEK_END)
+                known = (f.tell(), len(data))
+            else:
+                f.seek(known[0])
+            f.write(data)
+            f.flush()
+        except Exception:
+            row_offsets.clear()
+            raise
+        row_offsets[entry["filename"]] = known
+
 def save_annotation(current_index, file_list, labels, annotations):
     if not file_list or current_index is None or current_index >= len(file_list):
         return "No file to save", annotations
 
-    current_file = file_list[current_index]
-    filename = os.path.basename(current_file)
-    annotations = annotations[:] 
-    annotations[current_index] = {
-        "filename": filename,
-        "labels": ", ".join(labels) if labels else ""}
-    # persist:
-    try:
-        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=["filename", "labels"])
-            writer.writeheader()
-            for entry in annotations:
-                if entry:
-                    writer.writerow(entry)
-        return f"✅ Saved: {filename}", annotations
-    except Exception as e:
-        return f"❌ Error saving: {str(e)}", annotations
+    filename = file_list[current_index][1]
+    with _csv_lock:
+        # Re-insert so dict order is save order; the table shows the tail.
+        annotations.pop(filename, None)
+        annotations[filename] = {
+            "filename": filename,
+            "labels": list(labels) if labels else []}
+        # persist:
+        try:
+            persist_annotation(annotations[filename], annotations)
+            return f"✅ Saved: {filename}", annotations
+        except Exception as e:
+            return f"❌ Error saving: {str(e)}", annotations
 
 
-def load_existing_annotations():
+def read_annotation_file(source):
     existing = {}
-    if os.path.exists(OUTPUT_CSV):
-        try:
-            with open(OUTPUT_CSV, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-
-                    existing[row['filename']] = row
-        except Exception:
-            pass
+    if source == OUTPUT_CSV:
+        with open(OUTPUT_CSV, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                existing[row['filename']] = {
+                    "filename": row['filename'],
+                    "labels": [l.strip() for l in (row['labels'] or "").split(',') if l.strip()]}
+    else:
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        read = pq.read_table if source == OUTPUT_PARQUET else feather.read_table
+        for row in read(source).to_pylist():
+            existing[row['filename']] = {
+                "filename": row['filename'],
+                "labels": list(row['labels'] or [])}
     return existing
 
+def load_existing_annotations():
+    """
+    Loads the most recently written of OUTPUT_PARQUET, OUTPUT_FEATHER and
+    OUTPUT_CSV, falling back to the next one if it can't be read. Saves only
+    ever touch the CSV, so it wins mtime ties and an older Parquet/Feather
+    export never shadows newer labels.
+    """
+    # Held throughout so a same-length save can't slip between the stat and
+    # publishing the cache, and readers never see a half-updated cache.
+    with _csv_lock:
+        candidates = [OUTPUT_CSV]
+        if HAS_PYARROW:
+            candidates = [OUTPUT_PARQUET, OUTPUT_FEATHER, OUTPUT_CSV]
+        stats = {}
+        for p in candidates:
+            try:
+                stats[p] = os.stat(p)
+            except OSError:
+                pass
+        # Newest first; on equal mtime the later candidate (the CSV) wins.
+        ordered = sorted(stats, key=lambda p: (stats[p].st_mtime_ns, candidates.index(p)),
+                         reverse=True)
+        for source in ordered:
+            key = (source, stats[source].st_mtime_ns, stats[source].st_size)
+            if _csv_cache["key"] == key:
+                return _csv_cache["data"]
+            try:
+                existing = read_annotation_file(source)
+            except Exception:
+                continue
+            _csv_cache["key"] = key
+            _csv_cache["data"] = existing
+            return existing
+        return {}
+
 def init_annotations(file_list, existing_files):
-    annotations = [None] * len(file_list)
-    for i, filepath in enumerate(file_list):
-        filename = os.path.basename(filepath)
-        if filename in existing_files:
-            annotations[i] = existing_files[filename]
-    return annotations
+    # Keep the CSV's row order, which follows save order, not directory order.
+    names = {name for _, name in file_list}
+    return {name: entry for name, entry in existing_files.items() if name in names}
+
+_get_row = itemgetter("filename", "labels")
 
 def get_annotations_table(annotations):
-    return [[a["filename"], a["labels"]] for a in annotations if a]
+    """
+    Builds the rows for the annotation table. Only the last TABLE_MAX_ROWS
+    annotated files are included so each save pushes a bounded payload to
+    the browser; the CSV always holds everything.
+    """
+    with _csv_lock:
+        recent = list(islice(reversed(annotations.values()), TABLE_MAX_ROWS))
+    rows = [[filename, ", ".join(labels)] for filename, labels in map(_get_row, recent)]
+    rows.reverse()
+    return rows
 
 def update_label_choices(label_file_upload):
 
@@ -123,6 +328,7 @@ def update_label_choices(label_file_upload):
         if cleaned:
             label_choices = [s.title() for s in cleaned]
 
+    import gradio as gr
     return gr.update(choices=label_choices, value=[])
 
 def handle_load(dir_path):
@@ -136,20 +342,21 @@ def handle_load(dir_path):
     files = load_directory(path)
     if not files:
         return (
-            [], 0, [], 
-            None,  
+            [], 0, {},
+            None,
             "No files found", "",
-            "No files loaded", 0,
             []
         )
 
+    # A new directory starts a new CSV; the first save rewrites it in full.
+    row_offsets.clear()
     existing = load_existing_annotations()
     annots = init_annotations(files, existing)
 
     index, audio_file, status, filename = navigate_files(0, 0, files)
     selected_labels = []
-    if annots and annots[0]:
-        selected_labels = [l.strip() for l in annots[0]['labels'].split(',') if l.strip()]
+    if filename in annots:
+        selected_labels = annots[filename]['labels']
 
     table = get_annotations_table(annots)
 
@@ -162,15 +369,15 @@ def handle_load(dir_path):
 
 def save_labels(labels, idx, files, ann):
     preview = ", ".join(labels) if labels else ""
-    status, updated_ann = save_annotation(idx, files, labels, ann or [])
+    status, updated_ann = save_annotation(idx, files, labels, ann or {})
     table = get_annotations_table(updated_ann)
     return preview, updated_ann, status, table
 
 def navigate(direction, curr_idx, files, ann):
     new_idx, audio_file, status, filename = navigate_files(direction, curr_idx, files)
-    selected_labels = []
-    if ann and len(ann) > new_idx and ann[new_idx]:
-        selected_labels = [l.strip() for l in ann[new_idx]['labels'].split(',') if l.strip()]
+    # Single lookup: a concurrent delete may pop the key at any point.
+    entry = ann.get(filename) if ann else None
+    selected_labels = entry['labels'] if entry else []
     return (
         new_idx,
         audio_file,
@@ -182,34 +389,45 @@ def navigate(direction, curr_idx, files, ann):
 
 def delete_annotation(idx, files, ann):
     if not files or idx is None or idx >= len(files):
-        return "No file selected", ann, "No change", *get_annotation_status(ann or [])
-    ann = ann[:]  # copy
-    if ann and len(ann) > idx:
-        ann[idx] = None
-    # persist
-    try:
-        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=["filename", "labels"])
-            writer.writeheader()
-            for entry in ann:
-                if entry:
-                    writer.writerow(entry)
-        status = "✅ Deleted annotation"
-    except Exception as e:
-        status = f"❌ Error deleting: {e}"
+        return "No file selected", ann, get_annotations_table(ann or {})
+    filename = files[idx][1]
+    ann = ann or {}
+    with _csv_lock:
+        ann.pop(filename, None)
+        # persist
+        try:
+            write_annotations_csv(ann)
+            status = "✅ Deleted annotation"
+        except Exception as e:
+            status = f"❌ Error deleting: {e}"
     table = get_annotations_table(ann)
     return status, ann, table
 
-def export_annotations(ann):
+def annotations_to_table(ann):
+    import pyarrow as pa
+    return pa.Table.from_pylist(
+        list(ann.values()),
+        schema=pa.schema([("filename", pa.string()), ("labels", pa.list_(pa.string()))]))
+
+def export_annotations_parquet(ann):
+    import pyarrow.parquet as pq
+    pq.write_table(annotations_to_table(ann), OUTPUT_PARQUET)
+    return OUTPUT_PARQUET
+
+def export_annotations_feather(ann):
+    import pyarrow.feather as feather
+    feather.write_feather(annotations_to_table(ann), OUTPUT_FEATHER)
+    return OUTPUT_FEATHER
+
+def export_annotations(ann, file_format="CSV"):
     try:
         if ann is None:
-            ann = []
-        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=["filename", "labels"])
-            writer.writeheader()
-            for entry in ann:
-                if entry:
-                    writer.writerow(entry)
+            ann = {}
+        if file_format == "Parquet":
+            return export_annotations_parquet(ann), "✅ Exported Parquet"
+        if file_format == "Feather":
+            return export_annotations_feather(ann), "✅ Exported Feather"
+        write_annotations_csv(ann)
         return OUTPUT_CSV, "✅ Exported CSV"
     except Exception as e:
         return None, f"❌ Error exporting: {e}"
@@ -229,128 +447,140 @@ def save_and_next(labels, idx, files, ann):
 
 
 
-with gr.Blocks(css="""
-    .progress-bar input[type=range]::-webkit-slider-thumb { background: #4CAF50; }
-    .label-preview { font-size: 14px; color: #333; font-style: italic; margin-top: 4px; }
-    .nav-btn { font-size: 18px !important; height: 60px !important; }
-""") as demo:
-    file_list = gr.State([])
-    current_index = gr.State(0)
-    annotations = gr.State([])
-
-
-    with gr.Accordion("📂 Load Audio & Labels", open=True):
-        with gr.Row():
-            dir_input = gr.Textbox(label="Audio Directory", placeholder="/path/to/audio_folder")
-            load_btn = gr.Button("🔄 Load Files", variant="primary")
-        with gr.Row():
-            label_file_upload = gr.File(label="Upload labels.txt", file_types=['.txt'])
-            load_labels_btn = gr.Button("📥 Load Labels")
-        with gr.Row():
-            index_select=gr.Textbox(value="1",label="Select Index")
-            index_select_btn=gr.Button("Set Index")
+def build_demo():
+    import gradio as gr
 
-    with gr.Row():
+    with gr.Blocks(css="""
+        .progress-bar input[type=range]::-webkit-slider-thumb { background: #4CAF50; }
+        .label-preview { font-size: 14px; color: #333; font-style: italic; margin-top: 4px; }
+        .nav-btn { font-size: 18px !important; height: 60px !important; }
+    """) as demo:
+        file_list = gr.State([])
+        current_index = gr.State(0)
+        annotations = gr.State({})
 
-        with gr.Column(scale=1):
-            file_display = gr.Textbox(label="Filename", interactive=False)
-
-            audio = gr.Audio(label="🎵 Listen to Audio", interactive=False, type="filepath")
 
+        with gr.Accordion("📂 Load Audio & Labels", open=True):
             with gr.Row():
-                button_prev = gr.Button("⏮ Previous", variant="secondary", elem_classes=["nav-btn"])
-                button_next = gr.Button("Next ⏭", variant="secondary", elem_classes=["nav-btn"],elem_id="btn-next")
+                dir_input = gr.Textbox(label="Audio Directory", placeholder="/path/to/audio_folder")
+                load_btn = gr.Button("🔄 Load Files", variant="primary")
             with gr.Row():
-                save_btn = gr.Button("💾 Save Labels", variant="primary",elem_id="btn-save")
-                save_next_btn = gr.Button("💾➡️ Save + Next", variant="primary")
-            label_preview = gr.Markdown("*(No labels selected)*", elem_classes=["label-preview"])
-            labels_component = gr.CheckboxGroup(
-                label="Labels",
-                choices=[]
-            )
-
-
-
-        with gr.Column(scale=1):
-            file_status = gr.Textbox(label="File Status", interactive=False)
-            annotation_table = gr.Dataframe(
-                    headers=["filename", "labels"],
-                    value=[],
-                    interactive=False,
-                    wrap=True
-                    )
-
+                label_file_upload = gr.File(label="Upload labels.txt", file_types=['.txt'])
+                load_labels_btn = gr.Button("📥 Load Labels")
             with gr.Row():
-                delete_btn = gr.Button("🗑 Delete Annotation", variant="stop")
-                export_btn = gr.Button("📤 Export CSV", variant="primary")
-            export_file = gr.File(label="Download CSV", interactive=False)
-
-
-    load_labels_btn.click(
-            fn=update_label_choices,
-            inputs=[label_file_upload],
-            outputs=[labels_component]
-            )
-    index_select_btn.click(fn=lambda idx, files, ann: navigate(0, int(idx)-1, files, ann),
-            inputs=[index_select, file_list, annotations],
-            outputs=[current_index, audio, file_status, file_display, labels_component, label_preview])
-    load_btn.click(
-            fn=handle_load,
-            inputs=[dir_input],
-            outputs=[
-                file_list, current_index, annotations,
-                audio, file_status, file_display,
-                annotation_table
-                ]
-            )
-    save_next_btn.click(
-            fn=save_and_next,
-            inputs=[labels_component, current_index, file_list, annotations],
-            outputs=[
-                label_preview, annotations, file_status, annotation_table,  # save
-                current_index, audio, file_status, file_display, labels_component, label_preview  # next
-                ]
-            )
-
-    save_btn.click(
-            fn=save_labels,
-            inputs=[labels_component, current_index, file_list, annotations],
-            outputs=[label_preview, annotations, file_status, annotation_table]
-            )
-
-    button_prev.click(
-            fn=lambda idx, files, ann: navigate(-1, idx, files, ann),
-            inputs=[current_index, file_list, annotations],
-            outputs=[current_index, audio, file_status, file_display, labels_component, label_preview]
-            )
-
-    button_next.click(
-            fn=lambda idx, files, ann: navigate(1, idx, files, ann),
-            inputs=[current_index, file_list, annotations],
-            outputs=[current_index, audio, file_status, file_display, labels_component, label_preview]
-            )
-
-    labels_component.change(
-            fn=lambda labels: ", ".join(labels) if labels else "*(No labels selected)*",
-            inputs=labels_component,
-            outputs=label_preview
-            )
-
-    delete_btn.click(
-            fn=lambda idx, files, ann: delete_annotation(idx, files, ann),
-            inputs=[current_index, file_list, annotations],
-            outputs=[file_status, annotations, annotation_table]
-            )
-
-    export_btn.click(
-            fn=lambda ann: export_annotations(ann),
-            inputs=[annotations],
-            outputs=[export_file, file_status]
-            )
+                index_select=gr.Textbox(value="1",label="Select Index")
+                index_select_btn=gr.Button("Set Index")
+
+        with gr.Row():
 
+            with gr.Column(scale=1):
+                file_display = gr.Textbox(label="Filename", interactive=False)
+
+                audio = gr.Audio(label="🎵 Listen to Audio", interactive=False, type="filepath")
+
+                with gr.Row():
+                    button_prev = gr.Button("⏮ Previous", variant="secondary", elem_classes=["nav-btn"])
+                    button_next = gr.Button("Next ⏭", variant="secondary", elem_classes=["nav-btn"],elem_id="btn-next")
+                with gr.Row():
+                    save_btn = gr.Button("💾 Save Labels", variant="primary",elem_id="btn-save")
+                    save_next_btn = gr.Button("💾➡️ Save + Next", variant="primary")
+                label_preview = gr.Markdown("*(No labels selected)*", elem_classes=["label-preview"])
+                labels_component = gr.CheckboxGroup(
+                    label="Labels",
+                    choices=[]
+                )
+
+
+
+            with gr.Column(scale=1):
+                file_status = gr.Textbox(label="File Status", interactive=False)
+                annotation_table = gr.Dataframe(
+                        headers=["filename", "labels"],
+                        label=f"Latest {TABLE_MAX_ROWS} annotations",
+                        value=[],
+                        interactive=False,
+                        wrap=True
+                        )
+
+                with gr.Row():
+                    delete_btn = gr.Button("🗑 Delete Annotation", variant="stop")
+                    export_btn = gr.Button("📤 Export", variant="primary")
+                export_format = None
+                if HAS_PYARROW:
+                    export_format = gr.Radio(
+                        ["CSV", "Parquet", "Feather"], value="CSV", label="Export Format")
+                export_file = gr.File(label="Download Annotations", interactive=False)
+
+
+        load_labels_btn.click(
+                fn=update_label_choices,
+                inputs=[label_file_upload],
+                outputs=[labels_component]
+                )
+        index_select_btn.click(fn=lambda idx, files, ann: navigate(0, int(idx)-1, files, ann),
+                inputs=[index_select, file_list, annotations],
+                outputs=[current_index, audio, file_status, file_display, labels_component, label_preview])
+        load_btn.click(
+                fn=handle_load,
+                inputs=[dir_input],
+                outputs=[
+                    file_list, current_index, annotations,
+                    audio, file_status, file_display,
+                    annotation_table
+                    ]
+                )
+        save_next_btn.click(
+                fn=save_and_next,
+                inputs=[labels_component, current_index, file_list, annotations],
+                outputs=[
+                    label_preview, annotations, file_status, annotation_table,  # save
+                    current_index, audio, file_status, file_display, labels_component, label_preview  # next
+                    ]
+                )
+
+        save_btn.click(
+                fn=save_labels,
+                inputs=[labels_component, current_index, file_list, annotations],
+                outputs=[label_preview, annotations, file_status, annotation_table]
+                )
+
+        button_prev.click(
+                fn=lambda idx, files, ann: navigate(-1, idx, files, ann),
+                inputs=[current_index, file_list, annotations],
+                outputs=[current_index, audio, file_status, file_display, labels_component, label_preview]
+                )
+
+        button_next.click(
+                fn=lambda idx, files, ann: navigate(1, idx, files, ann),
+                inputs=[current_index, file_list, annotations],
+                outputs=[current_index, audio, file_status, file_display, labels_component, label_preview]
+                )
+
+        # Rendered client-side: toggling a checkbox costs no server round trip.
+        labels_component.change(
+                fn=None,
+                js="(labels) => labels && labels.length ? labels.join(', ') : '*(No labels selected)*'",
+                inputs=labels_component,
+                outputs=label_preview
+                )
+
+        delete_btn.click(
+                fn=lambda idx, files, ann: delete_annotation(idx, files, ann),
+                inputs=[current_index, file_list, annotations],
+                outputs=[file_status, annotations, annotation_table]
+                )
+
+        export_btn.click(
+                fn=export_annotations,
+                inputs=[annotations] if export_format is None else [annotations, export_format],
+                outputs=[export_file, file_status]
+                )
+
+    return demo
 
 
 if __name__ == "__main__":
-    demo.launch()
+    demo = build_demo()
+    demo.queue(default_concurrency_limit=4, max_size=64).launch()
 
 
@@ -0,0 +1,131 @@
+import os
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def fresh_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main.close_csv_handle()
+    main.row_offsets.clear()
+    main._csv_cache["key"] = None
+    yield
+    main.close_csv_handle()
+    main.row_offsets.clear()
+
+
+def read_csv():
+    with open(main.OUTPUT_CSV, 'rb') as f:
+        return f.read()
+
+
+def test_incremental_saves_match_full_rewrite():
+    files = [("/x/a.wav", "a.wav"), ("/x/b.wav", "b.wav")]
+    ann = {}
+    main.save_annotation(0, files, ["dog"], ann)
+    main.save_annotation(1, files, ["cat", "bird"], ann)
+    main.save_annotation(0, files, ["cow"], ann)            # same length: patched
+    main.save_annotation(0, files, ["zebra", "lion"], ann)  # longer: rewrite
+    main.save_annotation(1, files, ["owl"], ann)
+
+    assert read_csv() == b'filename,labels\r\na.wav,"zebra, lion"\r\nb.wav,owl\r\n'
+
+
+def test_failed_rewrite_does_not_leave_stale_offsets():
+    # A surrogate-escaped name (undecodable bytes from scandir) can't be
+    # encoded, so any full rewrite containing it fails.
+    bad = "b\udcff.wav"
+    files = [("/x/a.wav", "a.wav"), ("/x/b.wav", "b.wav"), ("/x/" + bad, bad)]
+    ann = {}
+    assert main.save_annotation(0, files, ["dog"], ann)[0].startswith("✅")
+    assert main.save_annotation(1, files, ["bird"], ann)[0].startswith("✅")
+    assert main.save_annotation(2, files, ["cat"], ann)[0].startswith("❌")
+    before = read_csv()
+
+    # Length change forces a rewrite, which fails on the bad row.
+    assert main.save_annotation(0, files, ["zebra"], ann)[0].startswith("❌")
+    assert main.row_offsets == {}
+    # Same length as the failed edit: must not patch at a stale offset.
+    status, ann = main.save_annotation(0, files, ["zebra"], ann)
+    assert status.startswith("❌")
+    assert read_csv() == before
+
+    del ann[bad]
+    assert main.save_annotation(0, files, ["zebra"], ann)[0].startswith("✅")
+    assert read_csv() == b'filename,labels\r\nb.wav,bird\r\na.wav,zebra\r\n'
+
+
+def test_table_shows_most_recently_saved(monkeypatch):
+    monkeypatch.setattr(main, "TABLE_MAX_ROWS", 3)
+    files = [(f"/x/f{i}.wav", f"f{i}.wav") for i in range(6)]
+    ann = {}
+    for i in range(6):
+        main.save_annotation(i, files, ["dog"], ann)
+    main.save_annotation(0, files, ["cat"], ann)
+
+    expected = [["f4.wav", "dog"], ["f5.wav", "dog"], ["f0.wav", "cat"]]
+    assert main.get_annotations_table(ann) == expected
+
+
+def test_load_directory_matches_suffixes_case_insensitively(tmp_path):
+    for name in ["b.wav", "a.MP3", "c.Flac", "d.txt"]:
+        (tmp_path / name).touch()
+    (tmp_path / "sub.wav").mkdir()
+
+    assert [name for _, name in main.load_directory(str(tmp_path))] == ["a.MP3", "b.wav", "c.Flac"]
+
+
+def test_c_encoder_matches_csv_writer(monkeypatch):
+    csvwriter = pytest.importorskip("_csvwriter")
+    rows = [
+        ("plain.wav", "dog"),
+        ("comma,name.wav", "a, b"),
+        ('quote"name.wav', 'say "hi"'),
+        ("cr\rname.wav", "line\nbreak"),
+        ("empty.wav", ""),
+        ("naïve-日本.wav", "chœur, ünïcode"),
+    ]
+    data, spans = csvwriter.encode_rows(rows)
+    expected = [main.encode_csv_row(row) for row in rows]
+    assert data == b"".join(expected)
+    offset = 0
+    for span, row_bytes in zip(spans, expected):
+        assert span == (offset, len(row_bytes))
+        offset += len(row_bytes)
+
+    # Full rewrite through the C path, then an in-place same-length patch.
+    assert main.encode_csv_rows_c is not None
+    files = [(f"/x/f{i},\"é\".wav", f"f{i},\"é\".wav") for i in range(main.C_ENCODER_MIN_ROWS + 50)]
+    ann = {name: {"filename": name, "labels": ["dog", "c\"t"] if i % 2 else []}
+           for i, (_, name) in enumerate(files)}
+    main.write_annotations_csv(ann)
+    offsets = dict(main.row_offsets)
+    assert main.save_annotation(501, files, ["cow", "c\"t"], ann)[0].startswith("✅")
+    assert main.row_offsets == offsets  # patched, not rewritten
+    with_c = read_csv()
+
+    # The patched row keeps its place in the file, so rebuild in file order.
+    expected = {name: ann[name] for _, name in files if name in ann}
+    main.close_csv_handle()
+    monkeypatch.setattr(main, "encode_csv_rows_c", None)
+    main.write_annotations_csv(expected)
+    assert with_c == read_csv()
+
+
+def test_load_prefers_csv_on_mtime_tie_and_skips_unreadable_exports(monkeypatch):
+    monkeypatch.setattr(main, "HAS_PYARROW", True)
+    files = [("/x/a.wav", "a.wav")]
+    ann = {}
+    main.save_annotation(0, files, ["dog"], ann)
+    with open(main.OUTPUT_PARQUET, 'wb') as f:
+        f.write(b"not a parquet file")
+    csv_stat = os.stat(main.OUTPUT_CSV)
+    os.utime(main.OUTPUT_PARQUET, ns=(csv_stat.st_atime_ns, csv_stat.st_mtime_ns))
+    assert main.load_existing_annotations() == {"a.wav": {"filename": "a.wav", "labels": ["dog"]}}
+
+    # Newer but corrupt: fall back to the CSV rather than returning nothing.
+    later = csv_stat.st_mtime_ns + 10**9
+    os.utime(main.OUTPUT_PARQUET, ns=(later, later))
+    assert main.load_existing_annotations() == {"a.wav": {"filename": "a.wav", "labels": ["dog"]}}